@@ -0,0 +1,199 @@
+# alert_engine.py
+# Evaluates threshold rules as each sensor reading / forecast update arrives,
+# instead of rescanning the whole forecast on every page load.
+import queue, threading, time
+from collections import deque, namedtuple
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from weather_service import (HEAVY_RAIN_THRESHOLD_MM_PER_H, WIND_ALERT_THRESHOLD_MS,
+                             TEMP_TOO_HOT, TEMP_TOO_COLD)
+
+# on: value that raises the alert, off: value that clears it (hysteresis band in between)
+Rule = namedtuple("Rule", ["name", "metric", "direction", "on", "off"])
+
+FORECAST_RULES = [
+    Rule("Heavy Rain Hourly", "precipitation", "above", HEAVY_RAIN_THRESHOLD_MM_PER_H, HEAVY_RAIN_THRESHOLD_MM_PER_H * 0.75),
+    Rule("High Wind Hourly", "windspeed_10m", "above", WIND_ALERT_THRESHOLD_MS, WIND_ALERT_THRESHOLD_MS * 0.9),
+    Rule("Too Hot", "temperature_2m", "above", TEMP_TOO_HOT, TEMP_TOO_HOT - 2),
+    Rule("Too Cold", "temperature_2m", "below", TEMP_TOO_COLD, TEMP_TOO_COLD + 2),
+]
+
+# Metric names match the sensor keys written by app.read_sensors()
+SENSOR_RULES = [
+    Rule("Sensor Too Hot", "Temperature", "above", TEMP_TOO_HOT, TEMP_TOO_HOT - 2),
+    Rule("Sensor Too Cold", "Temperature", "below", TEMP_TOO_COLD, TEMP_TOO_COLD + 2),
+    Rule("Dry Soil", "Soil Moisture", "below", 40, 45),
+]
+
+FORECAST_WINDOW_H = 24       # forecast hours ahead that are tracked and alerted on
+SUBSCRIBER_QUEUE_SIZE = 1000
+RECENT_ALERTS = 100
+
+
+def forecast_now(forecast_json):
+    """Current time in the forecast's timezone; Open-Meteo hourly times are local to it."""
+    offset = forecast_json.get("utc_offset_seconds")
+    if offset is not None:
+        return datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(seconds=offset)
+    try:
+        return datetime.now(ZoneInfo(forecast_json["timezone"])).replace(tzinfo=None)
+    except (KeyError, ZoneInfoNotFoundError):
+        return datetime.now()
+
+
+def _overlaps(a, b):
+    """Whether two (first, last, ...) hour ranges share an hour."""
+    return a[0] <= b[1] and b[0] <= a[1]
+
+
+class AlertEngine:
+    """Incremental rule evaluation with per-device hysteresis state.
+
+    Only state transitions are emitted, so a value hovering above a threshold
+    produces one "raised" alert and one "cleared" alert, not one per reading.
+    Forecasts are tracked as events: a run of consecutive hours where a rule is
+    active, with the same hysteresis applied along the time axis. Each event is
+    raised once and cleared once; a revision that only moves or stretches a known
+    event is silent.
+    """
+
+    def __init__(self, rules=FORECAST_RULES + SENSOR_RULES):
+        self.rules = list(rules)
+        self._by_metric = {}        # metric -> [(bit, rule)], so a reading only touches its own rules
+        for bit, rule in enumerate(self.rules):
+            self._by_metric.setdefault(rule.metric, []).append((1 << bit, rule))
+        self._active = {}           # device -> bitmask of active rules
+        self._forecast_events = {}  # device -> {rule bit: [(first hour, last hour, peak value)]}
+        self._subscribers = []
+        self.recent = deque(maxlen=RECENT_ALERTS)
+        self._lock = threading.Lock()
+
+    # ------------------- Subscribers -------------------
+    def subscribe(self, maxsize=SUBSCRIBER_QUEUE_SIZE):
+        q = queue.Queue(maxsize=maxsize)
+        with self._lock:
+            self._subscribers.append(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            if q in self._subscribers:
+                self._subscribers.remove(q)
+
+    def _emit(self, alert):
+        self.recent.append(alert)
+        for q in self._subscribers:
+            try:
+                q.put_nowait(alert)
+            except queue.Full:
+                # Slow consumer: drop its oldest alert rather than block ingest
+                try:
+                    q.get_nowait()
+                except queue.Empty:
+                    pass
+                q.put_nowait(alert)
+
+    # ------------------- Evaluation -------------------
+    @staticmethod
+    def _crossings(rule, value):
+        """(raises the rule, clears the rule) for one value."""
+        if rule.direction == "above":
+            return value >= rule.on, value < rule.off
+        return value <= rule.on, value > rule.off
+
+    def _evaluate(self, mask, device, metric, value, timestamp):
+        """Apply the metric's rules to `mask`, emitting transitions; returns the new mask."""
+        rules = self._by_metric.get(metric)
+        if not rules or value is None:
+            return mask
+        for bit, rule in rules:
+            active = mask & bit
+            raise_it, clear_it = self._crossings(rule, value)
+            if not active and raise_it:
+                mask |= bit
+                state = "raised"
+            elif active and clear_it:
+                mask &= ~bit
+                state = "cleared"
+            else:
+                continue
+            self._emit({"device": device, "rule": rule.name, "metric": metric,
+                        "value": value, "time": timestamp, "state": state})
+        return mask
+
+    def observe(self, device, metric, value, timestamp=None):
+        """Feed one sensor reading."""
+        with self._lock:
+            mask = self._evaluate(self._active.get(device, 0), device, metric, value,
+                                  timestamp or time.strftime("%Y-%m-%d %H:%M:%S"))
+            if mask:
+                self._active[device] = mask
+            else:
+                self._active.pop(device, None)
+
+    def _events(self, rule, hours):
+        """Runs of consecutive active hours in [(time, value)], as [(first, last, peak)]."""
+        events, run = [], None
+        for t, value in hours:
+            if value is None:
+                continue
+            raise_it, clear_it = self._crossings(rule, value)
+            if run is None:
+                if raise_it:
+                    run = [t, t, value]
+            elif clear_it:
+                events.append(tuple(run))
+                run = None
+            else:
+                run[1] = t
+                run[2] = max(run[2], value) if rule.direction == "above" else min(run[2], value)
+        if run is not None:
+            events.append(tuple(run))
+        return events
+
+    def _emit_event(self, device, rule, event, state):
+        first, last, peak = event
+        self._emit({"device": device, "rule": rule.name, "metric": rule.metric,
+                    "value": peak, "time": first, "until": last, "state": state})
+
+    def observe_forecast(self, device, forecast_json, now=None):
+        """Feed an Open-Meteo forecast; hours from now to FORECAST_WINDOW_H ahead are evaluated.
+
+        now: datetime in the forecast's timezone (default: forecast_now(forecast_json)).
+        """
+        now = (now or forecast_now(forecast_json)).replace(minute=0, second=0, microsecond=0)
+        start = now.strftime("%Y-%m-%dT%H:%M")
+        end = (now + timedelta(hours=FORECAST_WINDOW_H)).strftime("%Y-%m-%dT%H:%M")
+        hourly = forecast_json.get("hourly", {})
+        window = [(i, t) for i, t in enumerate(hourly.get("time", [])) if start <= t < end]
+        with self._lock:
+            previous = self._forecast_events.get(device, {})
+            current = {}
+            for metric, rules in self._by_metric.items():
+                values = hourly.get(metric)
+                hours = [(t, values[i] if i < len(values) else None) for i, t in window] if values else None
+                for bit, rule in rules:
+                    # Events that have fully passed are dropped silently; they can no longer happen
+                    old = [e for e in previous.get(bit, []) if e[1] >= start]
+                    if hours is None:
+                        new = old    # metric not in this forecast: keep what we knew
+                    else:
+                        new = self._events(rule, hours)
+                        for event in new:
+                            if not any(_overlaps(event, o) for o in old):
+                                self._emit_event(device, rule, event, "raised")
+                        for event in old:
+                            if not any(_overlaps(event, n) for n in new):
+                                self._emit_event(device, rule, event, "cleared")
+                    if new:
+                        current[bit] = new
+            if current:
+                self._forecast_events[device] = current
+            else:
+                self._forecast_events.pop(device, None)
+
+    def active_alerts(self, device):
+        mask = self._active.get(device, 0)
+        for bit in self._forecast_events.get(device, {}):
+            mask |= bit
+        return [rule.name for bit, rule in enumerate(self.rules) if mask & (1 << bit)]
@@ -1,8 +1,12 @@
 from flask import Flask, render_template, jsonify, request, send_from_directory
 import serial, threading, time, csv, re, os
 from datetime import datetime
-import requests
 from weather_service import get_weather_for_district
+from weather_client import get_client, WeatherUnavailable
+from weather_grid import ForecastGrid
+from alert_engine import AlertEngine
+from recommendation_cache import RecommendationCache
+from online_model import ModelStore, OnlineTrainer, TARGET_COLUMN
 import pandas as pd
 import matplotlib.pyplot as plt
 import io, base64
@@ -15,11 +19,15 @@ from recommender import generate_recommendations
 
 app = Flask(__name__)
 CSV_FILE = "iot_data.csv"
+SERIAL_PORT = os.environ.get("SERIAL_PORT", "COM7")
+SERIAL_POLL_DELAY_S = 0.1
+DEVICE_ID = SERIAL_PORT
+alert_engine = AlertEngine()
 
 
 # ------------------- Arduino Setup -------------------
 try:
-    ser = serial.Serial('COM7', 9600, timeout=1)
+    ser = serial.Serial(SERIAL_PORT, 9600, timeout=1)
     time.sleep(2)
 except:
     ser = None
@@ -39,6 +47,7 @@ def parse_line(line):
 
 # ------------------- Latest Data -------------------
 latest_data = {}
+csv_lock = threading.Lock()  # serial readers and request threads share CSV_FILE
 
 def write_csv():
     with open(CSV_FILE, "w", newline="") as f:
@@ -47,6 +56,46 @@ def write_csv():
         for sensor, item in latest_data.items():
             writer.writerow(item)
 
+def ingest_line(line, device=DEVICE_ID):
+    """Store one Arduino line; returns the sensor key, or None if the line was not a reading."""
+    sensor_key = None
+    value = parse_line(line)
+    unit = ""
+
+    # Determine sensor type and unit
+    if line.startswith("DHT11 - Temperature"):
+        sensor_key = "Temperature"
+        unit = "°C"
+    elif line.startswith("DHT11 - Humidity"):
+        sensor_key = "Humidity"
+        unit = "%"
+    elif line.startswith("Soil Moisture"):
+        sensor_key = "Soil Moisture"
+        unit = ""
+    elif line.startswith("LDR (Analog)"):
+        sensor_key = "LDR"
+        unit = ""
+    elif line.startswith("MPL3115A2 - Pressure"):
+        sensor_key = "Pressure"
+        unit = "hPa"
+    elif line.startswith("MPL3115A2 - Altitude"):
+        sensor_key = "Altitude"
+        unit = "m"
+
+    if not (sensor_key and value):
+        return None
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with csv_lock:
+        latest_data[sensor_key] = {
+            "Timestamp": timestamp,
+            "Sensor": sensor_key,
+            "Value": value,
+            "Unit": unit
+        }
+        write_csv()  # overwrite CSV with latest values
+    alert_engine.observe(device, sensor_key, float(value), timestamp)
+    return sensor_key
+
 def read_sensors():
     if not ser:
         return
@@ -55,43 +104,10 @@ def read_sensors():
             line = ser.readline().decode('utf-8').strip()
             if not line:
                 continue
-
-            sensor_key = None
-            value = parse_line(line)
-            unit = ""
-
-            # Determine sensor type and unit
-            if line.startswith("DHT11 - Temperature"):
-                sensor_key = "Temperature"
-                unit = "°C"
-            elif line.startswith("DHT11 - Humidity"):
-                sensor_key = "Humidity"
-                unit = "%"
-            elif line.startswith("Soil Moisture"):
-                sensor_key = "Soil Moisture"
-                unit = ""
-            elif line.startswith("LDR (Analog)"):
-                sensor_key = "LDR"
-                unit = ""
-            elif line.startswith("MPL3115A2 - Pressure"):
-                sensor_key = "Pressure"
-                unit = "hPa"
-            elif line.startswith("MPL3115A2 - Altitude"):
-                sensor_key = "Altitude"
-                unit = "m"
-
-            if sensor_key and value:
-                latest_data[sensor_key] = {
-                    "Timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "Sensor": sensor_key,
-                    "Value": value,
-                    "Unit": unit
-                }
-                write_csv()  # overwrite CSV with latest values
-
+            ingest_line(line)
         except Exception as e:
             print("Error reading/writing sensor:", e)
-        time.sleep(0.1)
+        time.sleep(SERIAL_POLL_DELAY_S)
 
 sensor_thread = threading.Thread(target=read_sensors, daemon=True)
 sensor_thread.start()
@@ -100,7 +116,7 @@ def read_csv_data():
     data = []
     if os.path.isfile(CSV_FILE):
         try:
-            with open(CSV_FILE, "r") as f:
+            with csv_lock, open(CSV_FILE, "r") as f:
                 reader = csv.DictReader(f)
                 for row in reader:
                     data.append(row)
@@ -119,11 +135,10 @@ def get_latest_sensor_value(sensor_name):
     return None
 
 # ------------------- Weather API -------------------
-OPEN_METEO_ENDPOINT = "https://api.open-meteo.com/v1/forecast"
 HOURLY_VARS = ["temperature_2m", "precipitation", "windspeed_10m", "cloudcover"]
 LAT, LON = 23.344315, 85.296013
 
-def fetch_weather(lat, lon):
+def fetch_weather_json(lat, lon):
     params = {
         "latitude": lat,
         "longitude": lon,
@@ -131,9 +146,18 @@ def fetch_weather(lat, lon):
         "timezone": "Asia/Kolkata",
         "forecast_days": 1
     }
-    r = requests.get(OPEN_METEO_ENDPOINT, params=params, timeout=30)
-    r.raise_for_status()
-    data = r.json()
+    return get_client().get_json(params)
+
+# Nearby farms snap to the same cell and reuse its forecast
+weather_grid = ForecastGrid(fetch_weather_json)
+
+def fetch_weather(lat, lon):
+    try:
+        data = weather_grid.get(lat, lon)
+        alert_engine.observe_forecast(weather_grid.cell_of(lat, lon), data)
+    except WeatherUnavailable as e:
+        print("Weather unavailable:", e)
+        return {"rain": 0, "wind": 0, "cloud": 0}
     hourly = data.get("hourly", {})
     times = hourly.get("time", [])
     rain = hourly.get("precipitation", [])
@@ -163,6 +187,43 @@ STATIC_VALUES = {
     "S": 12.21
 }
 
+recommendation_cache = RecommendationCache()
+model_store = ModelStore()
+online_trainer = OnlineTrainer(model_store)
+
+# Dashboard input names -> training column names (same as the /manual form fields)
+MODEL_FEATURE_NAMES = {"Temperature": "Temparature", "Pressure": "PS",
+                       "Wind": "Wind Speed", "Cloud": "CLOUD_AMT"}
+
+def score_crops(inputs, top_n=2):
+    temp, humidity = inputs["Temperature"], inputs["Humidity"]
+    moisture, rainfall = inputs["Moisture"], inputs["Rainfall"]
+
+    # Simple rule-based scoring for crops
+    scores = {"Rice": 0, "Wheat": 0, "Cotton": 0}
+
+    if temp > 28 and moisture > 40 and inputs["Nitrogen"] > 15:
+        scores["Rice"] += 3
+    if temp > 25 and humidity < 70 and rainfall < 5:
+        scores["Wheat"] += 3
+    if inputs["Potassium"] < 5 or humidity > 70:
+        scores["Cotton"] += 2
+    if moisture < 40:
+        scores["Wheat"] += 1
+    if rainfall > 50:
+        scores["Rice"] += 1
+
+    # Sort crops by score descending
+    sorted_crops = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+    return [c[0] for c in sorted_crops[:top_n]]
+
+def predict_crops(inputs, top_n=2):
+    """Top crops from the live ML model; rule-based scoring until a model is trained."""
+    suggestions = model_store.suggest({MODEL_FEATURE_NAMES.get(k, k): v for k, v in inputs.items()}, top_n)
+    if suggestions is None:
+        return score_crops(inputs, top_n)
+    return [crop for crop, _ in suggestions]
+
 def recommend_crop(top_n=2):
     # Get IoT values
     temp = get_latest_sensor_value("Temperature") or 25
@@ -191,25 +252,13 @@ def recommend_crop(top_n=2):
         **soil
     }
 
-    # Simple rule-based scoring for crops
-    scores = {"Rice": 0, "Wheat": 0, "Cotton": 0}
-
-    if temp > 28 and moisture > 40 and soil["Nitrogen"] > 15:
-        scores["Rice"] += 3
-    if temp > 25 and humidity < 70 and rainfall < 5:
-        scores["Wheat"] += 3
-    if soil["Potassium"] < 5 or humidity > 70:
-        scores["Cotton"] += 2
-    if moisture < 40:
-        scores["Wheat"] += 1
-    if rainfall > 50:
-        scores["Rice"] += 1
-
-    # Sort crops by score descending
-    sorted_crops = sorted(scores.items(), key=lambda x: x[1], reverse=True)
-    top_crops = [c[0] for c in sorted_crops[:top_n]]
+    # Scored on the bucket centres, so similar conditions share one cached result;
+    # the model version is part of the key so a swapped-in model is used immediately
+    model_store.get()
+    top_crops = recommendation_cache.get_or_compute(
+        input_values, lambda snapped: predict_crops(snapped, top_n), top_n, model_store.version)
 
-    return top_crops, input_values
+    return list(top_crops), input_values
 
 
 # ------------------- Flask Routes -------------------
@@ -246,21 +295,8 @@ def manual():
             **soil
         }
 
-        # Use same scoring logic as recommend_crop
-        scores = {"Rice": 0, "Wheat": 0, "Cotton": 0}
-        if temp > 28 and moisture > 40 and soil["Nitrogen"] > 15:
-            scores["Rice"] += 3
-        if temp > 25 and humidity < 70 and rainfall < 5:
-            scores["Wheat"] += 3
-        if soil["Potassium"] < 5 or humidity > 70:
-            scores["Cotton"] += 2
-        if moisture < 40:
-            scores["Wheat"] += 1
-        if rainfall > 50:
-            scores["Rice"] += 1
-
-        sorted_crops = sorted(scores.items(), key=lambda x: x[1], reverse=True)
-        crops = [c[0] for c in sorted_crops[:2]]
+        # Same model (or rule scoring, until one is trained) as recommend_crop
+        crops = predict_crops(inputs, top_n=2)
 
     return render_template("manual.html", crops=crops, inputs=inputs)
 
@@ -293,6 +329,35 @@ def recommend_crop_page():
     return render_template("recommend_crop.html", crops=crops, inputs=inputs, t=t, lang=lang)
 
 
+# ------------------- ML Model (incremental updates) -------------------
+@app.route("/field_observation", methods=["POST"])
+def field_observation():
+    bundle = model_store.get()
+    if bundle is None:
+        return jsonify({"error": "No trained model loaded."}), 503
+    observation = request.get_json(silent=True)
+    if observation is None:
+        observation = request.form.to_dict()
+    if not isinstance(observation, dict):
+        return jsonify({"error": "Expected a JSON object."}), 400
+    if not observation.get(TARGET_COLUMN):
+        return jsonify({"error": f"'{TARGET_COLUMN}' label is required."}), 400
+    online_trainer.add(observation, bundle["features"] + [TARGET_COLUMN])
+    return jsonify({"buffered": online_trainer.pending})
+
+@app.route("/model_status")
+def model_status():
+    return jsonify({**model_store.status(), **online_trainer.status()})
+
+@app.route("/cache_stats")
+def cache_stats():
+    return jsonify({"recommendations": recommendation_cache.stats(),
+                    "weather_grid": weather_grid.stats()})
+
+@app.route("/alerts")
+def alerts():
+    return jsonify(list(alert_engine.recent))
+
 @app.route("/iot")
 def iot():
     return jsonify(list(latest_data.values()))
@@ -1,13 +1,11 @@
-import pandas as pd
+from crop_dataset import dataset_columns, load_crop_data
 
-# Load your filled dataset
-df = pd.read_csv("jharkhand_crops_filled_int.csv")
-
-# Exclude last column (assuming it is crop name or non-numeric)
-numeric_cols = df.select_dtypes(include='number').columns[:-1]
+# Exclude last numeric column, then load only the columns we average
+numeric_cols = [col for col, kind in dataset_columns().items() if kind == "numeric"][:-1]
+df = load_crop_data(columns=numeric_cols)
 
 # Calculate averages for these columns
-column_averages = df[numeric_cols].mean()
+column_averages = df[numeric_cols].astype("float64").mean()  # float32 on disk, average in float64
 
 # Print results
 print("📊 Average values for each numeric column (excluding last):\n")
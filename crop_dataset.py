@@ -0,0 +1,120 @@
+# crop_dataset.py
+# Loads the crop dataset from a Parquet copy of the CSV. The CSV is parsed once;
+# later loads read only the requested columns with float32 / category dtypes.
+import hashlib, json, os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+DATASET_CSV = "jharkhand_crops_filled_int.csv"
+TARGET_COLUMN = "Crop"
+CHUNK_ROWS = 500_000         # CSV rows parsed per chunk while converting
+CACHE_VERSION = 1            # bump when the conversion logic changes
+
+
+def _cache_paths(csv_path):
+    base = os.path.splitext(csv_path)[0]
+    return base + ".parquet", base + ".parquet.json"
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _downcast(chunk, numeric_cols, coerced):
+    for col in chunk.columns:
+        if col in numeric_cols:
+            values = pd.to_numeric(chunk[col], errors="coerce")
+            bad = int((values.isna() & chunk[col].notna()).sum())
+            if bad:
+                coerced[col] = coerced.get(col, 0) + bad
+            chunk[col] = values.astype("float32")
+        else:
+            # Kept as plain strings on disk; read back as category via read_dictionary
+            chunk[col] = chunk[col].astype("string")
+    return chunk
+
+
+def _convert(csv_path, parquet_path):
+    """Write the Parquet copy; returns {column: values coerced to NaN}."""
+    tmp = parquet_path + ".tmp"
+    writer, schema, numeric_cols = None, None, None
+    coerced = {}
+    try:
+        for chunk in pd.read_csv(csv_path, chunksize=CHUNK_ROWS):
+            if numeric_cols is None:
+                # Column types are decided from the first chunk so every row group matches;
+                # non-numeric values in later chunks become NaN and are counted in `coerced`
+                numeric_cols = {c for c in chunk.columns
+                                if c != TARGET_COLUMN and pd.api.types.is_numeric_dtype(chunk[c])}
+            table = pa.Table.from_pandas(_downcast(chunk, numeric_cols, coerced), schema=schema, preserve_index=False)
+            if writer is None:
+                schema = table.schema
+                writer = pq.ParquetWriter(tmp, schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    os.replace(tmp, parquet_path)
+    for col, count in coerced.items():
+        print(f"Warning: {count} non-numeric value(s) in '{col}' of {csv_path} stored as NaN")
+    return coerced
+
+
+def ensure_cache(csv_path=DATASET_CSV):
+    """Build the Parquet copy if it is missing or the CSV content changed. Returns its path."""
+    parquet_path, meta_path = _cache_paths(csv_path)
+    stat = os.stat(csv_path)
+    meta = None
+    if os.path.isfile(parquet_path) and os.path.isfile(meta_path):
+        try:
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+        except ValueError:
+            meta = None
+
+    if meta and meta.get("version") == CACHE_VERSION:
+        # Unchanged size and mtime: skip re-hashing the whole file
+        if meta["size"] == stat.st_size and meta["mtime_ns"] == stat.st_mtime_ns:
+            return parquet_path
+        digest = _sha256(csv_path)
+        if digest == meta["sha256"]:
+            meta.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)  # touched, not changed
+            _write_meta(meta_path, meta)
+            return parquet_path
+    else:
+        digest = _sha256(csv_path)
+
+    coerced = _convert(csv_path, parquet_path)
+    _write_meta(meta_path, {"version": CACHE_VERSION, "sha256": digest,
+                            "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "coerced": coerced})
+    return parquet_path
+
+
+def _write_meta(meta_path, meta):
+    tmp = meta_path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp, meta_path)
+
+
+def dataset_columns(csv_path=DATASET_CSV):
+    """Column name -> "numeric" or "category", read from the cached schema without loading rows."""
+    schema = pq.read_schema(ensure_cache(csv_path))
+    return {name: "numeric" if pa.types.is_floating(schema.field(name).type) else "category"
+            for name in schema.names}
+
+
+def load_crop_data(columns=None, csv_path=DATASET_CSV):
+    """Load the dataset (optionally only `columns`): numeric features as float32, text as category."""
+    path = ensure_cache(csv_path)
+    schema = pq.read_schema(path)
+    wanted = columns if columns is not None else schema.names
+    text_cols = [c for c in wanted if pa.types.is_string(schema.field(c).type)
+                 or pa.types.is_large_string(schema.field(c).type)]
+    table = pq.read_table(path, columns=list(wanted), read_dictionary=text_cols)
+    return table.to_pandas()
@@ -0,0 +1,235 @@
+# loadtest.py
+# Virtual sensor fleet + HTTP load generator, so ingest and dashboard throughput
+# can be measured without Arduinos.
+#   python loadtest.py --devices 20 --rate 5 --clients 8 --duration 30
+#   python loadtest.py --transport loop --devices 5
+#   python loadtest.py --url http://127.0.0.1:5000   # HTTP load only, against a running server
+# The in-process app runs in a temporary working directory with the offline
+# weather stub unless --live-weather is given.
+import argparse, logging, os, random, shutil, sys, tempfile, threading, time
+
+import requests
+import serial
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+ENDPOINTS = ["/iot_data", "/recommend_crop", "/market"]
+READ_TIMEOUT_S = 0.5
+
+
+# ------------------- Virtual Devices -------------------
+def sensor_lines():
+    """One reading cycle in the exact format the Arduino sketch prints."""
+    return [
+        f"DHT11 - Temperature: {random.uniform(18, 40):.1f} *C",
+        f"DHT11 - Humidity: {random.uniform(30, 95):.1f} %",
+        f"Soil Moisture: {random.randint(200, 900)}",
+        f"LDR (Analog): {random.randint(0, 1023)}",
+        f"MPL3115A2 - Pressure: {random.uniform(990, 1020):.2f} hPa",
+        f"MPL3115A2 - Altitude: {random.uniform(550, 700):.1f} m",
+    ]
+
+
+class VirtualDevice:
+    """A fake Arduino: writes sensor lines into a pty (or pyserial loop://) that a reader drains."""
+
+    def __init__(self, name, rate, transport="pty"):
+        self.name = name
+        self.rate = rate
+        self.emitted = 0      # lines generated
+        self.overflowed = 0   # lines the transport refused (buffer full)
+        self.ingested = 0     # lines accepted by app.ingest_line
+        if transport == "pty":
+            import pty, tty
+            self._master, self._slave = pty.openpty()
+            tty.setraw(self._slave)
+            os.set_blocking(self._master, False)  # a full buffer drops lines, like a UART overrun
+            self.port = serial.Serial(os.ttyname(self._slave), 9600, timeout=READ_TIMEOUT_S)
+        else:
+            self._master = self._slave = None
+            self.port = serial.serial_for_url("loop://", timeout=READ_TIMEOUT_S)
+
+    def _write(self, data):
+        if self._master is None:
+            self.port.write(data)
+            return True
+        try:
+            return os.write(self._master, data) == len(data)
+        except BlockingIOError:
+            return False
+
+    def emit(self, stop):
+        interval = 1.0 / self.rate
+        next_at = time.perf_counter()
+        while not stop.is_set():
+            for line in sensor_lines():
+                if stop.is_set():
+                    break
+                self.emitted += 1
+                if not self._write((line + "\r\n").encode("utf-8")):
+                    self.overflowed += 1
+                next_at += interval
+                delay = next_at - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+    def ingest(self, app_module, stop, poll_delay):
+        # Same loop shape as app.read_sensors(), one reader per device
+        while not stop.is_set():
+            try:
+                line = self.port.readline().decode("utf-8").strip()
+                if not line:
+                    continue
+                if app_module.ingest_line(line, device=self.name):
+                    self.ingested += 1
+            except Exception as e:
+                print(f"{self.name}: ingest error:", e)
+            if poll_delay:
+                time.sleep(poll_delay)
+
+    def close(self):
+        self.port.close()
+        for fd in (self._master, self._slave):
+            if fd is not None:
+                os.close(fd)
+
+
+# ------------------- HTTP Clients -------------------
+def http_client(base_url, endpoints, stop, results, lock):
+    session = requests.Session()
+    i = random.randrange(len(endpoints))
+    local = []
+    while not stop.is_set():
+        endpoint = endpoints[i % len(endpoints)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            ok = session.get(base_url + endpoint, timeout=30).status_code < 400
+        except requests.RequestException:
+            ok = False
+        local.append((endpoint, time.perf_counter() - start, ok))
+    with lock:
+        results.extend(local)
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[k]
+
+
+# ------------------- Setup -------------------
+def prepare_workdir(workdir):
+    """Run the app against throwaway data files; synthesise market_data.csv if none exists."""
+    src = os.path.join(os.getcwd(), "market_data.csv")
+    dst = os.path.join(workdir, "market_data.csv")
+    if os.path.isfile(src):
+        shutil.copy(src, dst)
+        return
+    crops = ["Wheat", "Maize", "Niger Seed", "Paddy", "Pea", "Potato", "Pulses", "Sugarcane", "Cotton"]
+    with open(dst, "w") as f:
+        f.write("Date,Crop,Price,MarketDemand\n")
+        for day in range(1, 31):
+            for crop in crops:
+                f.write(f"2025-01-{day:02d},{crop},{random.uniform(10, 60):.2f},{random.randint(50, 500)}\n")
+
+
+def start_server(app_module):
+    from werkzeug.serving import make_server
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)  # no per-request access log
+    server = make_server("127.0.0.1", 0, app_module.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Virtual sensor fleet and dashboard load test")
+    parser.add_argument("--devices", type=int, default=None,
+                        help="virtual devices feeding the in-process app (default: 10, or 0 with --url)")
+    parser.add_argument("--rate", type=float, default=6.0, help="lines per second per device")
+    parser.add_argument("--transport", choices=["pty", "loop"], default="pty")
+    parser.add_argument("--poll-delay", type=float, default=None,
+                        help="reader sleep per line (default: app.SERIAL_POLL_DELAY_S)")
+    parser.add_argument("--clients", type=int, default=4, help="concurrent HTTP clients")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS))
+    parser.add_argument("--url", default=None, help="base URL of a running server (default: start one in-process)")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds")
+    parser.add_argument("--drain", type=float, default=2.0, help="seconds to let readers catch up after emitting stops")
+    parser.add_argument("--live-weather", action="store_true", help="use the real weather API instead of the stub")
+    args = parser.parse_args(argv)
+    if args.url and args.devices:
+        # Devices call ingest_line() in this process; a remote server would never see their readings
+        parser.error("--devices only feeds the in-process app; use --devices 0 with --url")
+    n_devices = args.devices if args.devices is not None else (0 if args.url else 10)
+
+    base_url, server, workdir, app_module, poll_delay = args.url, None, None, None, 0
+    if base_url is None:
+        workdir = tempfile.mkdtemp(prefix="loadtest-")
+        prepare_workdir(workdir)
+        os.chdir(workdir)
+        sys.path.insert(0, PROJECT_DIR)
+        if not args.live_weather:
+            from weather_stub import start_stub
+            os.environ["OPEN_METEO_ENDPOINT"] = start_stub().endpoint
+        import app as app_module  # after OPEN_METEO_ENDPOINT is set; weather_client reads it at import
+        poll_delay = app_module.SERIAL_POLL_DELAY_S if args.poll_delay is None else args.poll_delay
+        server, base_url = start_server(app_module)
+
+    devices = [VirtualDevice(f"virtual-{i}", args.rate, args.transport) for i in range(n_devices)]
+    emit_stop, ingest_stop, http_stop = threading.Event(), threading.Event(), threading.Event()
+    threads = []
+    for d in devices:
+        threads.append(threading.Thread(target=d.ingest, args=(app_module, ingest_stop, poll_delay), daemon=True))
+        threads.append(threading.Thread(target=d.emit, args=(emit_stop,), daemon=True))
+    results, lock = [], threading.Lock()
+    endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+    clients = [threading.Thread(target=http_client, args=(base_url, endpoints, http_stop, results, lock), daemon=True)
+               for _ in range(args.clients if endpoints else 0)]
+
+    print(f"Running {n_devices} devices ({args.transport}, {args.rate:g} lines/s each) "
+          f"and {len(clients)} HTTP clients against {base_url} for {args.duration:g}s ...")
+    started = time.perf_counter()
+    for t in threads + clients:
+        t.start()
+    time.sleep(args.duration)
+    emit_stop.set()
+    http_stop.set()
+    elapsed = time.perf_counter() - started
+    for t in clients:
+        t.join()
+    time.sleep(args.drain)
+    ingest_stop.set()
+    for t in threads:
+        t.join(timeout=READ_TIMEOUT_S + 1)
+
+    # ------------------- Report -------------------
+    emitted = sum(d.emitted for d in devices)
+    ingested = sum(d.ingested for d in devices)
+    overflowed = sum(d.overflowed for d in devices)
+    dropped = emitted - ingested
+    if devices:
+        print("\nIngest")
+        print(f"  lines emitted     {emitted}")
+        print(f"  lines ingested    {ingested}  ({ingested / elapsed:.1f} lines/s sustained)")
+        print(f"  dropped readings  {dropped}  ({100 * dropped / emitted if emitted else 0:.1f}%, "
+              f"{overflowed} refused by a full transport buffer)")
+
+    print("\nHTTP")
+    print(f"  {'endpoint':<18}{'requests':>9}{'errors':>8}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}")
+    for endpoint in endpoints:
+        rows = [r for r in results if r[0] == endpoint]
+        latencies = sorted(r[1] * 1000 for r in rows)
+        errors = sum(1 for r in rows if not r[2])
+        print(f"  {endpoint:<18}{len(rows):>9}{errors:>8}{len(rows) / elapsed:>9.1f}"
+              f"{percentile(latencies, 50):>9.1f}{percentile(latencies, 99):>9.1f}")
+
+    for d in devices:
+        d.close()
+    if server is not None:
+        server.shutdown()
+        os.chdir(PROJECT_DIR)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+# online_model.py
+# Grows the crop model with extra trees fitted only on newly labelled field
+# observations, instead of rerunning train_model_final.py end to end.
+#   python online_model.py     # nightly: fold field_observations.csv into the model
+import copy, csv, os, threading, time
+from contextlib import contextmanager
+import joblib
+import numpy as np
+import pandas as pd
+
+MODEL_FILE = "crop_recommendation_model.pkl"
+ENCODER_FILE = "label_encoder.pkl"
+FEATURES_FILE = "feature_columns.pkl"
+MEANS_FILE = "feature_means.pkl"
+REPLAY_FILE = "replay_sample.pkl"   # small per-crop sample saved by train_model_final.py
+BUFFER_FILE = "field_observations.csv"
+UPDATE_LOCK_FILE = MODEL_FILE + ".lock"   # held by whichever process (server or nightly job) is training
+TARGET_COLUMN = "Crop"
+
+BATCH_SIZE = 200          # observations per mini-batch
+TREES_PER_BATCH = 10      # trees added per mini-batch
+MAX_INCREMENTAL_TREES = 200   # oldest incremental trees are retired beyond this; base trees are kept
+RELOAD_CHECK_S = 30       # how often the server looks for a model written by the nightly job
+
+
+# ------------------- Model files -------------------
+def load_bundle():
+    """Model + encoder + feature list + means + replay sample, or None if not trained yet."""
+    if not os.path.isfile(MODEL_FILE):
+        return None
+    return {
+        "model": joblib.load(MODEL_FILE),
+        "encoder": joblib.load(ENCODER_FILE),
+        "features": joblib.load(FEATURES_FILE),
+        "means": joblib.load(MEANS_FILE),
+        "replay": joblib.load(REPLAY_FILE) if os.path.isfile(REPLAY_FILE) else None,
+    }
+
+def save_model(model):
+    tmp = f"{MODEL_FILE}.{os.getpid()}.tmp"
+    joblib.dump(model, tmp)
+    os.replace(tmp, MODEL_FILE)  # atomic: readers get the old or the new file, never half of one
+
+
+@contextmanager
+def file_lock(path):
+    """Exclusive lock across processes (the server and `python online_model.py`); blocks until free."""
+    with open(path, "a+") as f:
+        if os.name == "nt":
+            import msvcrt
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)  # gives up after ~10 s; keep waiting
+                    break
+                except OSError:
+                    pass
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+# ------------------- Incremental growth -------------------
+def prepare_batch(df, bundle):
+    """Features/labels for a batch of observations; rows with crops the encoder doesn't know are skipped."""
+    known = df[TARGET_COLUMN].isin(bundle["encoder"].classes_)
+    skipped = int((~known).sum())
+    df = df[known]
+    X = df.reindex(columns=bundle["features"]).apply(pd.to_numeric, errors="coerce")
+    X = X.fillna(bundle["means"]).astype("float32")
+    y = bundle["encoder"].transform(df[TARGET_COLUMN])
+    return X, y, skipped
+
+def grow_model(model, X, y, replay=None, n_trees=TREES_PER_BATCH, max_incremental=MAX_INCREMENTAL_TREES):
+    """Copy of `model` with `n_trees` extra trees fitted on (X, y) only.
+
+    warm_start re-derives classes_ from the batch, so every class must be present;
+    the replay sample guarantees that for batches that only cover a few crops.
+    The trees from the full training run (n_base_estimators_) are never retired.
+    """
+    if replay is not None:
+        X = pd.concat([X, replay[0]], ignore_index=True)
+        y = np.concatenate([y, replay[1]])
+    if len(np.unique(y)) != len(model.classes_):
+        raise ValueError("Batch does not cover every crop class; save a replay sample with train_model_final.py.")
+
+    n_base = getattr(model, "n_base_estimators_", len(model.estimators_))
+    batches = getattr(model, "incremental_batches_", 0) + 1
+    new = copy.copy(model)
+    new.estimators_ = list(model.estimators_)  # existing trees are shared, never refit
+    new.warm_start = True
+    new.n_estimators = len(new.estimators_) + n_trees
+    # warm_start derives new tree seeds from random_state after skipping len(estimators_)
+    # draws; once the forest stops growing that would repeat, so vary it per batch
+    base_seed = model.random_state if isinstance(model.random_state, int) else 0
+    new.random_state = (base_seed + batches) % 2**32
+    new.fit(X, y)
+
+    base, incremental = new.estimators_[:n_base], new.estimators_[n_base:]
+    if len(incremental) > max_incremental:
+        incremental = incremental[-max_incremental:]
+    new.estimators_ = base + incremental
+    new.n_estimators = len(new.estimators_)
+    new.n_base_estimators_ = n_base
+    new.incremental_batches_ = batches
+    return new
+
+def update_from_frame(bundle, df, batch_size=BATCH_SIZE):
+    """Grow bundle["model"] over df in mini-batches. Returns (new_model, rows_used, rows_skipped)."""
+    model, used, skipped = bundle["model"], 0, 0
+    for start in range(0, len(df), batch_size):
+        X, y, n_skipped = prepare_batch(df.iloc[start:start + batch_size], bundle)
+        skipped += n_skipped
+        if len(y):
+            model = grow_model(model, X, y, bundle["replay"])
+            used += len(y)
+    return model, used, skipped
+
+
+# ------------------- Live model -------------------
+class ModelStore:
+    """Holds the serving model. Swaps replace one reference, so in-flight predictions keep the old model."""
+
+    def __init__(self):
+        self._bundle = None
+        self._mtime = None
+        self._checked = float("-inf")
+        self._lock = threading.Lock()
+        self.updates = 0
+        self.version = 0    # bumped on every reload or swap; callers can key caches on it
+
+    def get(self):
+        now = time.monotonic()
+        if now - self._checked >= RELOAD_CHECK_S:
+            self._checked = now
+            self._reload_if_changed()
+        return self._bundle
+
+    def _reload_if_changed(self):
+        try:
+            mtime = os.path.getmtime(MODEL_FILE)
+        except OSError:
+            return
+        if mtime == self._mtime:
+            return
+        with self._lock:
+            if mtime != self._mtime:
+                bundle = load_bundle()
+                if bundle is not None:
+                    self._bundle, self._mtime = bundle, mtime
+                    self.version += 1
+
+    def swap(self, bundle):
+        with self._lock:
+            self._bundle = bundle
+            self._mtime = os.path.getmtime(MODEL_FILE) if os.path.isfile(MODEL_FILE) else None
+            self.updates += 1
+            self.version += 1
+
+    def suggest(self, values, top_n=3):
+        """Top crops for a {feature: value} dict, as [(crop, probability %)]; None without a model."""
+        bundle = self.get()
+        if bundle is None:
+            return None
+        input_df = pd.DataFrame([values]).reindex(columns=bundle["features"]).fillna(bundle["means"])
+        probabilities = bundle["model"].predict_proba(input_df)[0]
+        top_indices = probabilities.argsort()[-top_n:][::-1]
+        return [(bundle["encoder"].inverse_transform([i])[0], float(round(probabilities[i] * 100, 2)))
+                for i in top_indices]
+
+    def status(self):
+        bundle = self._bundle
+        if bundle is None:
+            return {"loaded": False}
+        model = bundle["model"]
+        base = getattr(model, "n_base_estimators_", len(model.estimators_))
+        return {"loaded": True, "trees": len(model.estimators_), "base_trees": base,
+                "incremental_trees": len(model.estimators_) - base, "updates": self.updates}
+
+
+class OnlineTrainer:
+    """Buffers labelled observations on disk and folds them into the model once a batch is full.
+
+    The server and the nightly job may both run one of these against the same files;
+    the buffer and the update are guarded by lock files, not just in-process locks.
+    """
+
+    def __init__(self, store, buffer_file=BUFFER_FILE, batch_size=BATCH_SIZE):
+        self.store = store
+        self.buffer_file = buffer_file
+        self.processing_file = buffer_file + ".processing"
+        self.batch_size = batch_size
+        self.pending = self._count_rows(buffer_file)
+        self.stuck = self._count_rows(self.processing_file)  # rows left behind by a failed update
+        self.last_error = None
+        self._buffer_lock = threading.Lock()
+        self._update_lock = threading.Lock()
+
+    @staticmethod
+    def _count_rows(path):
+        if not os.path.isfile(path):
+            return 0
+        with open(path, "r") as f:
+            return max(0, sum(1 for _ in f) - 1)
+
+    def add(self, observation, fieldnames):
+        with self._buffer_lock, file_lock(self.buffer_file + ".lock"):
+            new_file = not os.path.isfile(self.buffer_file)
+            if new_file:
+                self.pending = 0    # another process took the buffer since our last add
+            with open(self.buffer_file, "a", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore")
+                if new_file:
+                    writer.writeheader()
+                writer.writerow(observation)
+            self.pending += 1
+            ready = self.pending >= self.batch_size
+        if ready and not self._update_lock.locked():
+            threading.Thread(target=self.update, daemon=True).start()
+
+    def _take_buffer(self):
+        """Move buffered rows into the .processing file; returns False if there is nothing to train on."""
+        with self._buffer_lock, file_lock(self.buffer_file + ".lock"):
+            # A leftover .processing file means the last update failed; keep those rows
+            if os.path.isfile(self.buffer_file):
+                if os.path.isfile(self.processing_file):
+                    pd.concat([pd.read_csv(self.processing_file), pd.read_csv(self.buffer_file)]) \
+                        .to_csv(self.processing_file, index=False)
+                    os.remove(self.buffer_file)
+                else:
+                    os.replace(self.buffer_file, self.processing_file)
+            self.pending = 0
+        return os.path.isfile(self.processing_file)
+
+    def update(self):
+        """Train on everything buffered, save, and swap the new model in. Returns rows used.
+
+        On failure the rows stay in the .processing file (counted in `stuck`) and are
+        retried with the next update.
+        """
+        with self._update_lock, file_lock(UPDATE_LOCK_FILE):
+            # Grow from the model on disk: the other process may have saved a newer one
+            # since this process last reloaded it
+            bundle = load_bundle()
+            if bundle is None or not self._take_buffer():
+                return 0
+
+            started = time.perf_counter()
+            try:
+                model, used, skipped = update_from_frame(bundle, pd.read_csv(self.processing_file), self.batch_size)
+                if used:
+                    save_model(model)
+            except Exception as e:
+                self.stuck = self._count_rows(self.processing_file)
+                self.last_error = str(e)
+                print(f"Model update failed; {self.stuck} observations kept in {self.processing_file}:", e)
+                return 0
+            if used:
+                self.store.swap({**bundle, "model": model})
+            os.remove(self.processing_file)
+            self.stuck, self.last_error = 0, None
+            print(f"Model update: {used} observations, {skipped} skipped (unknown crop), "
+                  f"{len(model.estimators_)} trees, {time.perf_counter() - started:.1f}s")
+            return used
+
+    def status(self):
+        return {"buffered": self.pending, "stuck": self.stuck, "last_error": self.last_error}
+
+
+if __name__ == "__main__":
+    trainer = OnlineTrainer(ModelStore())
+    if trainer.store.get() is None:
+        print("No trained model found; run train_model_final.py first.")
+    else:
+        used = trainer.update()
+        if trainer.last_error:
+            raise SystemExit(1)
+        if not used:
+            print("No new field observations.")
@@ -0,0 +1,90 @@
+# recommendation_cache.py
+# Reuses crop recommendations for inputs that only differ by sensor noise.
+import math, threading, time
+from collections import OrderedDict
+
+# ---- CONFIG ----
+# Bucket width per input; values in the same bucket share a cached result.
+# Bucket edges are multiples of the width, so keep app.score_crops thresholds on them.
+QUANTA = {
+    "Temperature": 0.5,   # °C
+    "Humidity": 1.0,      # %
+    "Moisture": 1.0,
+    "Pressure": 1.0,      # hPa
+    "Rainfall": 0.5,      # mm
+    "Wind": 0.5,          # m/s
+    "Cloud": 5.0,         # %
+}
+CACHE_TTL_S = 10 * 60
+CACHE_MAX_ENTRIES = 4096
+
+
+class RecommendationCache:
+    """LRU + TTL cache keyed by quantized inputs.
+
+    Buckets are the open intervals between multiples of the step, and a value exactly
+    on a multiple is a bucket of its own. With thresholds on the edges, every bucket
+    lies entirely on one side of each threshold, strict or not. The result is always
+    computed from the representative (see representative()), never from the raw
+    values, so each bucket has exactly one answer regardless of which request filled
+    it. Inputs without an entry in `quanta` (e.g. static soil values) are used as-is.
+    """
+
+    def __init__(self, quanta=QUANTA, ttl=CACHE_TTL_S, max_entries=CACHE_MAX_ENTRIES):
+        self.quanta = quanta
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # key -> (stored_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def representative(self, inputs):
+        """Inputs snapped to their bucket midpoints; values on an edge are kept as-is."""
+        snapped = {}
+        for name, value in inputs.items():
+            step = self.quanta.get(name)
+            if step and value is not None:
+                k = math.floor(value / step)
+                if value != k * step:
+                    value = (k + 0.5) * step
+            snapped[name] = value
+        return snapped
+
+    def make_key(self, inputs, *extra):
+        return tuple(sorted(self.representative(inputs).items())) + extra
+
+    def get_or_compute(self, inputs, compute, *extra):
+        """Cached result for `inputs` (plus any `extra` key parts).
+
+        On a miss, compute(representative_inputs) is called with the bucket midpoints.
+        """
+        key = self.make_key(inputs, *extra)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and now - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        value = compute(self.representative(inputs))  # outside the lock so slow scoring doesn't serialise requests
+        with self._lock:
+            self._entries[key] = (now, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0}
@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta, timezone
+
+from alert_engine import AlertEngine, SENSOR_RULES, FORECAST_RULES, forecast_now
+
+NOW = datetime(2026, 1, 1, 8, 30)
+
+
+def forecast(precip, day="2026-01-01"):
+    return {"hourly": {"time": [f"{day}T{h:02d}:00" for h in range(24)],
+                       "precipitation": precip,
+                       "temperature_2m": [25.0] * 24}}
+
+
+def drain(q):
+    items = []
+    while not q.empty():
+        items.append(q.get_nowait())
+    return items
+
+
+def test_sensor_hysteresis_and_dedup():
+    engine = AlertEngine(SENSOR_RULES)
+    q = engine.subscribe()
+    for value in [30, 39, 40, 38.5, 39, 35]:
+        engine.observe("d1", "Temperature", value)
+    assert [(a["rule"], a["state"], a["value"]) for a in drain(q)] == [
+        ("Sensor Too Hot", "raised", 39), ("Sensor Too Hot", "cleared", 35)]
+    assert engine.active_alerts("d1") == []
+
+
+def test_devices_are_independent():
+    engine = AlertEngine(SENSOR_RULES)
+    engine.observe("d1", "Soil Moisture", 10)
+    engine.observe("d2", "Soil Moisture", 80)
+    assert engine.active_alerts("d1") == ["Dry Soil"]
+    assert engine.active_alerts("d2") == []
+
+
+def test_slow_subscriber_drops_oldest():
+    engine = AlertEngine(SENSOR_RULES)
+    q = engine.subscribe(maxsize=2)
+    for device in ["a", "b", "c"]:
+        engine.observe(device, "Temperature", 45)
+    assert [a["device"] for a in drain(q)] == ["b", "c"]
+
+
+def test_forecast_revision_raises_and_clears():
+    engine = AlertEngine(FORECAST_RULES)
+    q = engine.subscribe()
+    engine.observe_forecast("cell", forecast([0.0] * 24), now=NOW)
+    assert drain(q) == []
+
+    revised = [0.0] * 10 + [40.0] * 14
+    engine.observe_forecast("cell", forecast(revised), now=NOW)
+    assert [(a["rule"], a["state"], a["time"], a["until"]) for a in drain(q)] == [
+        ("Heavy Rain Hourly", "raised", "2026-01-01T10:00", "2026-01-01T23:00")]   # one event, not 14 hours
+
+    engine.observe_forecast("cell", forecast(revised), now=NOW)   # same values: no duplicates
+    assert drain(q) == []
+
+    revised[12] = 9.0                                            # inside the hysteresis band
+    revised[9] = 12.0                                            # event starts an hour earlier
+    engine.observe_forecast("cell", forecast(revised), now=NOW)
+    assert drain(q) == []
+
+    engine.observe_forecast("cell", forecast([0.0] * 24), now=NOW)
+    assert [(a["state"], a["time"]) for a in drain(q)] == [("cleared", "2026-01-01T09:00")]
+    assert engine.active_alerts("cell") == []
+
+
+def test_forecast_separate_events_alert_separately():
+    engine = AlertEngine(FORECAST_RULES)
+    q = engine.subscribe()
+    precip = [0.0] * 24
+    precip[10:12] = [40.0, 40.0]
+    precip[18:20] = [40.0, 40.0]
+    engine.observe_forecast("cell", forecast(precip), now=NOW)
+    assert [(a["time"], a["until"]) for a in drain(q)] == [
+        ("2026-01-01T10:00", "2026-01-01T11:00"), ("2026-01-01T18:00", "2026-01-01T19:00")]
+
+
+def test_forecast_ignores_past_hours_and_drops_their_state():
+    engine = AlertEngine(FORECAST_RULES)
+    q = engine.subscribe()
+    precip = [40.0] * 12 + [0.0] * 12
+    engine.observe_forecast("cell", forecast(precip), now=NOW)
+    assert [a["time"] for a in drain(q)] == ["2026-01-01T08:00"]   # hours 0-7 have passed
+
+    later = datetime(2026, 1, 1, 20, 0)
+    engine.observe_forecast("cell", forecast([0.0] * 24), now=later)
+    assert drain(q) == []                                        # the event is over, not cleared
+    assert engine.active_alerts("cell") == []
+
+
+def test_forecast_now_uses_forecast_timezone():
+    utc_now = datetime.now(timezone.utc).replace(tzinfo=None)
+    ist = forecast_now({"timezone": "Asia/Kolkata", "utc_offset_seconds": 19800})
+    assert abs((ist - utc_now) - timedelta(hours=5, minutes=30)) < timedelta(seconds=5)
+    by_name = forecast_now({"timezone": "Asia/Kolkata"})
+    assert abs(by_name - ist) < timedelta(seconds=5)
@@ -0,0 +1,61 @@
+import pytest
+
+import app
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    return app.app.test_client()
+
+
+def test_field_observation_without_model(client, monkeypatch):
+    monkeypatch.setattr(app.model_store, "get", lambda: None)
+    assert client.post("/field_observation", json={"Crop": "Rice"}).status_code == 503
+
+
+@pytest.mark.parametrize("body", [[1, 2], "Rice", 3, {"Temparature": 30}])
+def test_field_observation_rejects_bad_bodies(client, monkeypatch, body):
+    monkeypatch.setattr(app.model_store, "get", lambda: {"features": ["Temparature"]})
+    assert client.post("/field_observation", json=body).status_code == 400
+
+
+def test_predict_crops_falls_back_to_rules(monkeypatch):
+    monkeypatch.setattr(app.model_store, "suggest", lambda values, top_n: None)
+    inputs = {"Temperature": 30, "Humidity": 50, "Moisture": 45, "Rainfall": 1,
+              "Pressure": 1000, "Wind": 2, "Cloud": 30, **app.STATIC_VALUES}
+    assert app.predict_crops(inputs) == app.score_crops(inputs)
+
+
+def test_predict_crops_uses_model_feature_names(monkeypatch):
+    seen = {}
+    def suggest(values, top_n):
+        seen.update(values)
+        return [("Maize", 80.0), ("Rice", 20.0)]
+    monkeypatch.setattr(app.model_store, "suggest", suggest)
+    assert app.predict_crops({"Temperature": 30, "Pressure": 1000, "Wind": 2, "Cloud": 30}) == ["Maize", "Rice"]
+    assert set(seen) == {"Temparature", "PS", "Wind Speed", "CLOUD_AMT"}
+
+
+def test_manual_uses_same_prediction_as_dashboard(client, monkeypatch):
+    seen = []
+    monkeypatch.setattr(app, "predict_crops", lambda inputs, top_n: seen.append((inputs, top_n)) or ["Maize", "Rice"])
+    form = {"Temparature": "30", "Humidity": "60", "Moisture": "45", "PS": "1000",
+            "Rainfall": "2", "Wind Speed": "3", "CLOUD_AMT": "40"}
+    response = client.post("/manual", data=form)
+    assert response.status_code == 200
+    assert b"Maize" in response.data
+    assert seen[0][0]["Temperature"] == 30.0 and seen[0][1] == 2
+
+
+def test_cache_buckets_keep_score_crops_thresholds():
+    base = {"Temperature": 26.0, "Humidity": 60.0, "Moisture": 45.0, "Rainfall": 1.0, **app.STATIC_VALUES}
+    sweeps = {"Temperature": [24.6, 25.0, 25.2, 27.8, 28.0, 28.1, 28.4],
+              "Humidity": [69.4, 69.9, 70.0, 70.2, 70.6],
+              "Moisture": [39.5, 40.0, 40.4, 40.6],
+              "Rainfall": [4.8, 5.0, 5.1, 49.9, 50.0, 50.3]}
+    for name, values in sweeps.items():
+        for value in values:
+            inputs = {**base, name: value}
+            snapped = app.recommendation_cache.representative(inputs)
+            assert app.score_crops(snapped) == app.score_crops(inputs), (name, value)
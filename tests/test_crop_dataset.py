@@ -0,0 +1,63 @@
+import json, os
+
+import pytest
+
+import crop_dataset
+from crop_dataset import dataset_columns, ensure_cache, load_crop_data
+
+ROWS = ["Temperature,Rainfall,Soil,Crop",
+        "25,120,Loam,Paddy",
+        "30,80,Sandy,Maize",
+        "22,95,Loam,Wheat",
+        "28,110,Clay,Paddy",
+        "27,trace,Loam,Maize"]
+
+
+@pytest.fixture
+def csv_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(crop_dataset, "CHUNK_ROWS", 2)   # several chunks / row groups
+    path = tmp_path / "crops.csv"
+    path.write_text("\n".join(ROWS) + "\n")
+    return str(path)
+
+
+@pytest.fixture
+def conversions(monkeypatch):
+    calls = []
+    convert = crop_dataset._convert
+    monkeypatch.setattr(crop_dataset, "_convert", lambda *a: calls.append(a) or convert(*a))
+    return calls
+
+
+def test_chunked_conversion_and_dtypes(csv_path, capsys):
+    df = load_crop_data(csv_path=csv_path)
+    assert len(df) == 5
+    assert str(df["Temperature"].dtype) == "float32"
+    assert str(df["Crop"].dtype) == "category"
+    assert df["Rainfall"].isna().sum() == 1             # "trace" in a later chunk
+    with open(csv_path.replace(".csv", ".parquet.json")) as f:
+        assert json.load(f)["coerced"] == {"Rainfall": 1}
+    assert "non-numeric" in capsys.readouterr().out
+
+
+def test_column_projection(csv_path):
+    df = load_crop_data(["Soil", "Crop"], csv_path=csv_path)
+    assert list(df.columns) == ["Soil", "Crop"]
+    assert dataset_columns(csv_path) == {"Temperature": "numeric", "Rainfall": "numeric",
+                                         "Soil": "category", "Crop": "category"}
+
+
+def test_cache_invalidated_by_content_not_mtime(csv_path, conversions):
+    ensure_cache(csv_path)
+    ensure_cache(csv_path)
+    assert len(conversions) == 1
+
+    os.utime(csv_path, ns=(0, 10**18))                  # touched, same content
+    ensure_cache(csv_path)
+    assert len(conversions) == 1
+
+    with open(csv_path, "w") as f:                       # same size, different content
+        f.write("\n".join(ROWS).replace("25,120", "26,120") + "\n")
+    ensure_cache(csv_path)
+    assert len(conversions) == 2
+    assert load_crop_data(["Temperature"], csv_path=csv_path)["Temperature"].iloc[0] == 26
@@ -0,0 +1,156 @@
+import threading
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import LabelEncoder
+
+import online_model
+from online_model import ModelStore, OnlineTrainer, grow_model
+
+FEATURES = ["Temparature", "Humidity", "Moisture"]
+CROPS = ["Maize", "Rice", "Wheat"]
+
+
+def make_frame(n, seed=0, crops=CROPS):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.uniform(0, 100, (n, len(FEATURES))).astype("float32"), columns=FEATURES)
+    df["Crop"] = rng.choice(crops, n)
+    return df
+
+
+@pytest.fixture
+def bundle():
+    df = make_frame(300)
+    encoder = LabelEncoder().fit(df["Crop"])
+    y = encoder.transform(df["Crop"])
+    model = RandomForestClassifier(n_estimators=20, random_state=42).fit(df[FEATURES], y)
+    replay = df[FEATURES].head(30), y[:30]
+    return {"model": model, "encoder": encoder, "features": FEATURES,
+            "means": df[FEATURES].mean(), "replay": replay}
+
+
+def save_bundle(bundle):
+    joblib.dump(bundle["model"], online_model.MODEL_FILE)
+    joblib.dump(bundle["encoder"], online_model.ENCODER_FILE)
+    joblib.dump(bundle["features"], online_model.FEATURES_FILE)
+    joblib.dump(bundle["means"], online_model.MEANS_FILE)
+    if bundle["replay"] is not None:
+        joblib.dump(bundle["replay"], online_model.REPLAY_FILE)
+
+
+def buffer_rows(trainer, n, seed, crops=CROPS):
+    for _, row in make_frame(n, seed=seed, crops=crops).iterrows():
+        trainer.add(row.to_dict(), FEATURES + ["Crop"])
+
+
+def test_grow_adds_trees_without_touching_existing(bundle):
+    model = bundle["model"]
+    X, y, _ = online_model.prepare_batch(make_frame(50, seed=1), bundle)
+    grown = grow_model(model, X, y, bundle["replay"], n_trees=5)
+    assert len(grown.estimators_) == 25
+    assert grown.estimators_[:20] == model.estimators_
+    assert len(model.estimators_) == 20                  # live model untouched
+    assert grown.predict_proba(X).shape == (len(X), 3)
+
+
+def test_batch_missing_classes_needs_replay(bundle):
+    X, y, _ = online_model.prepare_batch(make_frame(50, seed=1, crops=["Rice"]), bundle)
+    with pytest.raises(ValueError):
+        grow_model(bundle["model"], X, y, replay=None)
+    assert len(grow_model(bundle["model"], X, y, bundle["replay"]).classes_) == 3
+
+
+def test_base_trees_survive_the_cap(bundle):
+    model = bundle["model"]
+    base = list(model.estimators_)
+    seeds = []
+    for i in range(6):
+        X, y, _ = online_model.prepare_batch(make_frame(40, seed=i + 1), bundle)
+        model = grow_model(model, X, y, bundle["replay"], n_trees=5, max_incremental=10)
+        seeds.append(model.estimators_[-1].random_state)
+    assert model.estimators_[:20] == base
+    assert len(model.estimators_) == 30
+    assert model.n_base_estimators_ == 20
+    assert len(set(seeds)) == len(seeds)                 # seeds don't repeat once at the cap
+
+
+def test_unknown_crops_are_skipped(bundle):
+    df = make_frame(10, seed=2)
+    df.loc[:3, "Crop"] = "Dragonfruit"
+    X, y, skipped = online_model.prepare_batch(df, bundle)
+    assert skipped == 4
+    assert len(X) == len(y) == 6
+
+
+def test_trainer_update_swaps_live_model(bundle, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    save_bundle(bundle)
+    store = ModelStore()
+    store.swap(bundle)
+    version = store.version
+    trainer = OnlineTrainer(store, batch_size=1000)      # no background update while adding
+    buffer_rows(trainer, 50, seed=3)
+    assert trainer.pending == 50
+    trainer.batch_size = 25
+    assert trainer.update() == 50
+    assert trainer.pending == 0
+    assert len(store.get()["model"].estimators_) == 20 + 2 * online_model.TREES_PER_BATCH
+    assert store.version > version
+    assert store.suggest({"Temparature": 30, "Humidity": 60}, top_n=2)[0][0] in CROPS
+    assert (tmp_path / online_model.MODEL_FILE).exists()
+
+
+def test_update_grows_from_the_model_on_disk(bundle, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    save_bundle(bundle)
+    server_store, nightly_store = ModelStore(), ModelStore()
+    server_store.swap(bundle)                            # loaded before the nightly run
+    server = OnlineTrainer(server_store, batch_size=1000)
+    nightly = OnlineTrainer(nightly_store, batch_size=1000)
+
+    buffer_rows(server, 30, seed=4)
+    assert nightly.update() == 30
+    buffer_rows(server, 30, seed=5)
+    assert server.pending == 30                          # buffer was taken by the other process
+    assert server.update() == 30
+    trees = len(server_store.get()["model"].estimators_)
+    assert trees == 20 + 2 * online_model.TREES_PER_BATCH   # nightly trees were kept
+
+
+def test_concurrent_updates_train_each_row_once(bundle, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    save_bundle(bundle)
+    trainers = [OnlineTrainer(ModelStore(), batch_size=1000) for _ in range(2)]
+    buffer_rows(trainers[0], 40, seed=6)
+    used, errors = [], []
+    def run(trainer):
+        try:
+            used.append(trainer.update())
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=run, args=(t,)) for t in trainers]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert sorted(used) == [0, 40]
+
+
+def test_failed_update_keeps_rows_and_reports_them(bundle, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    save_bundle({**bundle, "replay": None})              # model trained before replay samples existed
+    trainer = OnlineTrainer(ModelStore(), batch_size=1000)
+    buffer_rows(trainer, 20, seed=7, crops=["Rice"])
+    assert trainer.update() == 0
+    assert trainer.status()["stuck"] == 20
+    assert "every crop class" in trainer.status()["last_error"]
+    assert trainer.pending == 0
+
+    joblib.dump(bundle["replay"], online_model.REPLAY_FILE)
+    buffer_rows(trainer, 10, seed=8, crops=["Rice"])
+    assert trainer.update() == 30                        # the stuck rows are retried
+    assert trainer.status() == {"buffered": 0, "stuck": 0, "last_error": None}
@@ -0,0 +1,63 @@
+import time
+
+from recommendation_cache import RecommendationCache
+
+
+def hot(inputs):
+    return ["Rice"] if inputs["Temperature"] > 28 else ["Wheat"]
+
+
+def test_bucket_answer_does_not_depend_on_fill_order():
+    for order in ([28.1, 28.4], [28.4, 28.1]):
+        cache = RecommendationCache()
+        answers = [cache.get_or_compute({"Temperature": t}, hot) for t in order]
+        assert answers[0] == answers[1] == hot({"Temperature": 28.25})
+
+
+def test_compute_sees_bucket_midpoints():
+    cache = RecommendationCache()
+    seen = []
+    cache.get_or_compute({"Temperature": 28.2, "Humidity": 69.6, "Nitrogen": 18.49},
+                         lambda snapped: seen.append(snapped) or "x")
+    assert seen == [{"Temperature": 28.25, "Humidity": 69.5, "Nitrogen": 18.49}]
+
+
+def test_values_on_an_edge_are_their_own_bucket():
+    cache = RecommendationCache()
+    assert cache.representative({"Temperature": 28.0}) == {"Temperature": 28.0}
+    assert cache.make_key({"Temperature": 28.0}) != cache.make_key({"Temperature": 28.2})
+    assert cache.make_key({"Temperature": 27.9}) != cache.make_key({"Temperature": 28.0})
+
+
+def test_hits_misses_and_extra_key_parts():
+    cache = RecommendationCache()
+    cache.get_or_compute({"Temperature": 30.1}, hot, 2)
+    cache.get_or_compute({"Temperature": 30.3}, hot, 2)
+    cache.get_or_compute({"Temperature": 30.2}, hot, 3)
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_ttl_expiry():
+    cache = RecommendationCache(ttl=0.05)
+    calls = []
+    compute = lambda snapped: calls.append(1) or "x"
+    cache.get_or_compute({"Temperature": 30}, compute)
+    cache.get_or_compute({"Temperature": 30}, compute)
+    time.sleep(0.06)
+    cache.get_or_compute({"Temperature": 30}, compute)
+    assert len(calls) == 2
+
+
+def test_lru_eviction():
+    cache = RecommendationCache(max_entries=2)
+    cache.get_or_compute({"Temperature": 20}, hot)
+    cache.get_or_compute({"Temperature": 25}, hot)
+    cache.get_or_compute({"Temperature": 20}, hot)        # refresh 20
+    cache.get_or_compute({"Temperature": 30}, hot)        # evicts 25
+    assert cache.stats()["evictions"] == 1
+    misses = cache.stats()["misses"]
+    cache.get_or_compute({"Temperature": 20}, hot)
+    assert cache.stats()["misses"] == misses
+    cache.get_or_compute({"Temperature": 25}, hot)
+    assert cache.stats()["misses"] == misses + 1
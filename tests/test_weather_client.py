@@ -0,0 +1,98 @@
+import threading, time
+
+import pytest
+
+from weather_client import CircuitBreaker, WeatherClient, WeatherUnavailable
+from weather_grid import ForecastGrid
+
+PARAMS = {"latitude": 23.3, "longitude": 85.3, "hourly": "precipitation", "forecast_days": 1}
+
+
+def make_client(stub, tmp_path, **kwargs):
+    kwargs.setdefault("breaker", CircuitBreaker(failure_threshold=100))
+    return WeatherClient(endpoint=stub.endpoint, fallback_dir=str(tmp_path), **kwargs)
+
+
+def test_retries_transient_errors(stub, tmp_path):
+    stub.fail_status, stub.fail_times = 503, 2
+    data = make_client(stub, tmp_path).get_json(PARAMS)
+    assert len(data["hourly"]["time"]) == 24
+    assert "stale" not in data
+    assert stub.hits == 3
+
+
+def test_stalled_upstream_stays_within_budget(stub, tmp_path):
+    stub.delay_s = 2.0
+    client = make_client(stub, tmp_path, read_timeout=0.2, retry_budget=0.5)
+    started = time.monotonic()
+    with pytest.raises(WeatherUnavailable):
+        client.get_json(PARAMS)
+    assert time.monotonic() - started < 0.9
+    assert 1 <= stub.hits <= 3
+
+
+def test_stale_fallback_from_disk(stub, tmp_path):
+    client = make_client(stub, tmp_path)
+    fresh = client.get_json(PARAMS)
+    stub.fail_status = 503
+    stale = make_client(stub, tmp_path, max_attempts=1).get_json(PARAMS)  # new client, same disk
+    assert stale["stale"] is True
+    assert stale["hourly"] == fresh["hourly"]
+
+
+def test_breaker_opens_half_opens_and_closes(stub, tmp_path):
+    breaker = CircuitBreaker(failure_threshold=2, reset_s=0.2)
+    client = make_client(stub, tmp_path, max_attempts=1, breaker=breaker)
+    client.get_json(PARAMS)
+    stub.fail_status = 503
+    for _ in range(2):
+        assert client.get_json(PARAMS)["stale"]
+    assert breaker.state == "open"
+
+    hits = stub.hits
+    started = time.monotonic()
+    assert client.get_json(PARAMS)["stale"]
+    assert stub.hits == hits                      # open: upstream not called
+    assert time.monotonic() - started < 0.05
+
+    time.sleep(0.25)
+    assert breaker.state == "half-open"
+    client.get_json(PARAMS)                       # failed probe re-opens
+    assert stub.hits == hits + 1
+    assert breaker.state == "open"
+
+    stub.fail_status = None
+    time.sleep(0.25)
+    assert "stale" not in client.get_json(PARAMS)  # successful probe closes
+    assert breaker.state == "closed"
+
+
+def test_grid_waiters_share_stale_result(stub, tmp_path):
+    client = make_client(stub, tmp_path, read_timeout=0.2, retry_budget=0.5)
+    grid = ForecastGrid(lambda lat, lon: client.get_json({**PARAMS, "latitude": lat, "longitude": lon}))
+    grid.get(23.3, 85.3)
+    grid._cells.clear()                           # force a refetch against a stalled upstream
+    stub.delay_s = 2.0
+
+    durations = []
+    def worker():
+        started = time.monotonic()
+        assert grid.get(23.3, 85.3)["stale"]
+        durations.append(time.monotonic() - started)
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert max(durations) < 0.9                   # one budget, not one per waiter
+
+
+def test_client_errors_do_not_open_breaker(stub, tmp_path):
+    breaker = CircuitBreaker(failure_threshold=2, reset_s=60)
+    client = make_client(stub, tmp_path, breaker=breaker)
+    stub.fail_status = 400
+    for _ in range(4):
+        with pytest.raises(WeatherUnavailable):
+            client.get_json(PARAMS)
+    assert stub.hits == 4                         # not retried
+    assert breaker.state == "closed"
@@ -0,0 +1,122 @@
+import threading, time
+
+import pytest
+
+import weather_grid
+import weather_service
+from weather_client import WeatherUnavailable
+from weather_grid import ForecastGrid
+
+
+class FakeFetch:
+    def __init__(self, fail_cells=()):
+        self.calls = []
+        self.fail_cells = set(fail_cells)
+
+    def __call__(self, lat, lon):
+        self.calls.append((lat, lon))
+        if (round(lat, 1), round(lon, 1)) in self.fail_cells:
+            raise WeatherUnavailable("down")
+        return {"cell": (lat, lon), "hourly": {}}
+
+
+def test_snapping_to_cell_centre():
+    grid = ForecastGrid(FakeFetch(), resolution=0.1)
+    assert grid.cell_of(23.344, 85.296) == (233, 853)
+    assert grid.cell_of(23.36, 85.31) == (234, 853)
+    assert grid.cell_center((233, 853)) == (23.3, 85.3)
+
+
+def test_farms_in_one_cell_share_a_fetch():
+    fetch = FakeFetch()
+    grid = ForecastGrid(fetch)
+    assert grid.get(23.31, 85.29) is grid.get(23.29, 85.34)
+    assert fetch.calls == [(23.3, 85.3)]
+
+
+def test_resolve_many_fetches_once_per_cell():
+    fetch = FakeFetch()
+    grid = ForecastGrid(fetch)
+    farms = {i: (23.3 + (i % 3) * 0.1, 85.3) for i in range(30)}
+    results = grid.resolve_many(farms)
+    assert len(results) == 30
+    assert len(fetch.calls) == 3
+    assert results[0] is results[3]
+
+
+def test_resolve_many_isolates_failing_cell():
+    grid = ForecastGrid(FakeFetch(fail_cells={(23.5, 85.3)}))
+    results = grid.resolve_many({"ok": (23.3, 85.3), "down": (23.5, 85.3)})
+    assert results["ok"]["cell"] == (23.3, 85.3)
+    assert isinstance(results["down"], WeatherUnavailable)
+
+
+def test_failure_is_cached_briefly():
+    fetch = FakeFetch(fail_cells={(23.3, 85.3)})
+    grid = ForecastGrid(fetch)
+    for _ in range(3):
+        with pytest.raises(WeatherUnavailable):
+            grid.get(23.3, 85.3)
+    assert len(fetch.calls) == 1
+
+
+def test_nearest_cached():
+    grid = ForecastGrid(FakeFetch())
+    assert grid.nearest_cached(23.3, 85.3) is None
+    grid.get(23.3, 85.3)
+    grid.get(23.6, 85.3)
+    cell, forecast, dist = grid.nearest_cached(23.41, 85.3)
+    assert cell == (233, 853)
+    assert 10 < dist < 13
+    assert grid.nearest_cached(25.0, 85.3) is None   # outside max_ring
+
+
+def test_expired_cells_are_pruned(monkeypatch):
+    monkeypatch.setattr(weather_grid, "PRUNE_INTERVAL_S", 0)
+    grid = ForecastGrid(FakeFetch(), ttl=0)
+    for i in range(10):
+        grid.get(23.0 + i * 0.1, 85.0)
+    assert len(grid._cells) <= 1
+    assert len(grid._cell_locks) <= 1
+
+
+def test_farms_batch_reports_errors_per_farm(monkeypatch):
+    grid = ForecastGrid(FakeFetch(fail_cells={(20.0, 80.0)}))
+    monkeypatch.setattr(weather_service, "forecast_grid", grid)
+    results = weather_service.get_weather_for_farms({"a": (23.3, 85.3), "b": (20.0, 80.0)})
+    assert "daily_summary" in results["a"]
+    assert results["b"] == {"error": "down"}
+
+
+def test_prune_keeps_lock_of_inflight_fetch():
+    started, release = threading.Event(), threading.Event()
+    calls = []
+    def slow_fetch(lat, lon):
+        calls.append((lat, lon))
+        started.set()
+        release.wait(2)
+        return {"hourly": {}}
+
+    grid = ForecastGrid(slow_fetch)
+    first = threading.Thread(target=grid.get, args=(23.3, 85.3))
+    first.start()
+    started.wait(2)
+    with grid._lock:
+        grid._prune(time.monotonic())             # prune while the first fetch is running
+    second = threading.Thread(target=grid.get, args=(23.3, 85.3))
+    second.start()
+    time.sleep(0.05)
+    release.set()
+    first.join()
+    second.join()
+    assert len(calls) == 1
+
+
+def test_cap_evicts_in_batches(monkeypatch):
+    monkeypatch.setattr(weather_grid, "MAX_CELLS", 10)
+    grid = ForecastGrid(FakeFetch())
+    for i in range(11):
+        grid.get(23.0 + i * 0.1, 85.0)
+    assert len(grid._cells) == 9                  # down to 90% of the cap, oldest first
+    assert grid.cell_of(23.0, 85.0) not in grid._cells
+    assert grid.cell_of(24.0, 85.0) in grid._cells
@@ -6,9 +6,7 @@ from sklearn.metrics import classification_report, accuracy_score
 from imblearn.over_sampling import SMOTE
 import joblib
 import os
-
-# 1. Load Dataset
-data = pd.read_csv("jharkhand_crops_filled_int.csv")
+from crop_dataset import load_crop_data
 
 # ✅ Match columns exactly as in CSV
 expected_columns = [
@@ -28,8 +26,8 @@ expected_columns = [
     "Crop"
 ]
 
-# Keep only required columns
-data = data[expected_columns]
+# 1. Load Dataset (only required columns; float32 features, categorical Crop)
+data = load_crop_data(columns=expected_columns)
 
 # 2. Handle Missing Values
 data = data.dropna(subset=['Crop'])  # remove rows with missing target
@@ -76,7 +74,14 @@ joblib.dump(label_encoder, "label_encoder.pkl")
 joblib.dump(list(X.columns), "feature_columns.pkl")
 joblib.dump(feature_means, "feature_means.pkl")
 
-print("✅ Model training complete with SMOTE balanced data! Model, encoder, feature list, and means saved.")
+# Small per-crop sample of the training data; online_model.py mixes it into each
+# incremental batch so the added trees always see every crop class
+replay = X_train.copy()
+replay["_label"] = y_train
+replay = replay.groupby("_label").head(25)
+joblib.dump((replay.drop(columns="_label"), replay["_label"].to_numpy()), "replay_sample.pkl")
+
+print("✅ Model training complete with SMOTE balanced data! Model, encoder, feature list, means and replay sample saved.")
 
 # 9. Function to Suggest Top Crops
 def suggest_crop(input_values, top_n=3):
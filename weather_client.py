@@ -0,0 +1,195 @@
+# weather_client.py
+import hashlib, json, os, random, threading, time
+import requests
+from requests.adapters import HTTPAdapter
+
+# ---- CONFIG ----
+# Point this at weather_stub.py (e.g. http://127.0.0.1:8765/v1/forecast) to run offline.
+OPEN_METEO_ENDPOINT = os.environ.get("OPEN_METEO_ENDPOINT", "https://api.open-meteo.com/v1/forecast")
+
+# A stalled read costs READ_TIMEOUT_S, so two stalled attempts plus backoff fit in
+# RETRY_BUDGET_S; the last attempt's timeouts are clipped to whatever budget is left.
+CONNECT_TIMEOUT_S = 0.5
+READ_TIMEOUT_S = 1.0
+POOL_SIZE = 10
+
+MAX_ATTEMPTS = 3
+BACKOFF_BASE_S = 0.1
+BACKOFF_CAP_S = 0.5
+RETRY_BUDGET_S = 2.5        # total wall time allowed across all attempts
+
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_S = 60.0
+
+FALLBACK_DIR = "weather_cache"
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+def _is_client_error(error):
+    """A non-retryable 4xx: upstream answered, our request was bad."""
+    response = getattr(error, "response", None)
+    return (response is not None and 400 <= response.status_code < 500
+            and response.status_code not in RETRYABLE_STATUS)
+
+
+class WeatherUnavailable(Exception):
+    """Upstream failed and no last-known-good forecast is stored."""
+
+
+# -----------------------------
+# Circuit breaker
+# -----------------------------
+class CircuitBreaker:
+    """Opens after N consecutive failures; lets one trial call through after the reset period."""
+
+    def __init__(self, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_s=BREAKER_RESET_S):
+        self.failure_threshold = failure_threshold
+        self.reset_s = reset_s
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_s or self._trial_running:
+                return False
+            self._trial_running = True  # half-open: a single probe
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.reset_s else "open"
+
+
+# -----------------------------
+# Last-known-good store
+# -----------------------------
+class FallbackStore:
+    """Keeps the last successful response per request on local disk."""
+
+    def __init__(self, directory=FALLBACK_DIR):
+        self.directory = directory
+
+    def _path(self, params):
+        key = hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()
+        return os.path.join(self.directory, f"{key}.json")
+
+    def save(self, params, data):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(params)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"saved_at": time.time(), "data": data}, f)
+        os.replace(tmp, path)  # atomic, readers never see a half-written file
+
+    def load(self, params):
+        try:
+            with open(self._path(params), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+
+# -----------------------------
+# Shared client
+# -----------------------------
+class WeatherClient:
+    def __init__(self, endpoint=OPEN_METEO_ENDPOINT, fallback_dir=FALLBACK_DIR,
+                 connect_timeout=CONNECT_TIMEOUT_S, read_timeout=READ_TIMEOUT_S,
+                 max_attempts=MAX_ATTEMPTS, retry_budget=RETRY_BUDGET_S, breaker=None):
+        self.endpoint = endpoint
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_attempts = max_attempts
+        self.retry_budget = retry_budget
+        self.breaker = breaker or CircuitBreaker()
+        self.fallback = FallbackStore(fallback_dir)
+
+        # One keep-alive pool shared by every caller; retries are handled below, not by urllib3.
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _fetch(self, params):
+        deadline = time.monotonic() + self.retry_budget
+        last_error = None
+        for attempt in range(self.max_attempts):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                r = self.session.get(self.endpoint, params=params,
+                                     timeout=(min(self.connect_timeout, remaining),
+                                              min(self.read_timeout, remaining)))
+                if r.status_code not in RETRYABLE_STATUS:
+                    r.raise_for_status()  # other 4xx are our fault; retrying won't help
+                    return r.json()
+                last_error = requests.HTTPError(f"{r.status_code} from weather API", response=r)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                last_error = e
+
+            # Full jitter, never sleeping past the budget
+            delay = random.uniform(0, min(BACKOFF_CAP_S, BACKOFF_BASE_S * 2 ** attempt))
+            if attempt + 1 >= self.max_attempts or time.monotonic() + delay >= deadline:
+                break
+            time.sleep(delay)
+        raise last_error or requests.Timeout("weather retry budget exhausted")
+
+    def get_json(self, params):
+        """Forecast JSON for `params`; falls back to the last good copy when upstream is down.
+
+        Fallback responses carry "stale": True and "saved_at" (epoch seconds).
+        """
+        if self.breaker.allow():
+            try:
+                data = self._fetch(params)
+            except (requests.RequestException, ValueError) as e:
+                if _is_client_error(e):
+                    self.breaker.record_success()  # upstream is healthy; don't open the breaker for everyone
+                else:
+                    self.breaker.record_failure()
+                print("Weather API failed, using fallback:", e)
+            else:
+                self.breaker.record_success()
+                try:
+                    self.fallback.save(params, data)
+                except OSError as e:
+                    print("Could not store weather fallback:", e)
+                return data
+
+        cached = self.fallback.load(params)
+        if cached is None:
+            raise WeatherUnavailable("Weather service unavailable and no saved forecast.")
+        return {**cached["data"], "stale": True, "saved_at": cached["saved_at"]}
+
+
+_default_client = None
+_default_lock = threading.Lock()
+
+def get_client():
+    global _default_client
+    if _default_client is None:
+        with _default_lock:
+            if _default_client is None:
+                _default_client = WeatherClient()
+    return _default_client
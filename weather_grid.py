@@ -0,0 +1,153 @@
+# weather_grid.py
+# Snaps farm coordinates to a fixed forecast grid so every farm in the same cell
+# shares one cached upstream forecast.
+import math, threading, time
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+# ---- CONFIG ----
+GRID_RESOLUTION_DEG = 0.1    # ~11 km, close to the native resolution of the forecast models
+FORECAST_TTL_S = 30 * 60
+STALE_TTL_S = 30             # offline fallbacks and failures are shared briefly so waiters don't refetch
+MAX_CELLS = 50_000           # hard cap on cached cells; expired ones are pruned first
+PRUNE_TO_FRACTION = 0.9      # at the cap, evict down to this share so the scan isn't repeated per insert
+PRUNE_INTERVAL_S = 60
+NEAREST_MAX_RING = 3         # how many cells out nearest_cached() searches
+BATCH_WORKERS = 4
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * 6371.0 * math.asin(math.sqrt(a))
+
+
+class ForecastGrid:
+    """Cell-bucketed forecast cache.
+
+    fetch: callable(lat, lon) -> forecast dict, called with the cell centre.
+    Responses marked "stale" (offline fallback) and fetch errors are only cached for
+    stale_ttl, so requests queued on the same cell reuse them instead of each waiting
+    on upstream again.
+    """
+
+    def __init__(self, fetch, resolution=GRID_RESOLUTION_DEG, ttl=FORECAST_TTL_S, stale_ttl=STALE_TTL_S):
+        self.fetch = fetch
+        self.resolution = resolution
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._cells = {}          # (i, j) -> (expires_at, forecast or the exception raised)
+        self._cell_locks = {}     # (i, j) -> [lock, threads using it]
+        self._lock = threading.Lock()
+        self._pruned_at = time.monotonic()
+
+    # ------------------- Grid geometry -------------------
+    def cell_of(self, lat, lon):
+        return (round(lat / self.resolution), round(lon / self.resolution))
+
+    def cell_center(self, cell):
+        return (round(cell[0] * self.resolution, 6), round(cell[1] * self.resolution, 6))
+
+    # ------------------- Cache access -------------------
+    def _fresh(self, cell):
+        entry = self._cells.get(cell)
+        if entry and time.monotonic() < entry[0]:
+            return entry[1]
+        return None
+
+    @contextmanager
+    def _locked_cell(self, cell):
+        # The user count keeps _prune from dropping a lock that a fetch holds or waits on
+        with self._lock:
+            entry = self._cell_locks.setdefault(cell, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+
+    def get_cell(self, cell):
+        forecast = self._fresh(cell)
+        if forecast is None:
+            # One upstream call per cell even when many farms ask at once
+            with self._locked_cell(cell):
+                forecast = self._fresh(cell)
+                if forecast is None:
+                    try:
+                        forecast = self.fetch(*self.cell_center(cell))
+                    except Exception as e:
+                        forecast = e
+                    ttl = self.stale_ttl if isinstance(forecast, Exception) or forecast.get("stale") else self.ttl
+                    self._store(cell, forecast, ttl)
+        if isinstance(forecast, Exception):
+            raise forecast
+        return forecast
+
+    def _store(self, cell, forecast, ttl):
+        now = time.monotonic()
+        with self._lock:
+            self._cells[cell] = (now + ttl, forecast)
+            if now - self._pruned_at >= PRUNE_INTERVAL_S or len(self._cells) > MAX_CELLS:
+                self._prune(now)
+
+    def _prune(self, now):
+        # Caller holds self._lock
+        self._pruned_at = now
+        for cell in [c for c, (expires_at, _) in self._cells.items() if expires_at <= now]:
+            del self._cells[cell]
+        if len(self._cells) > MAX_CELLS:
+            target = int(MAX_CELLS * PRUNE_TO_FRACTION)
+            for cell in list(self._cells)[:len(self._cells) - target]:  # oldest insertion first
+                del self._cells[cell]
+        for cell in [c for c, (_, users) in self._cell_locks.items() if not users]:
+            del self._cell_locks[cell]
+
+    def get(self, lat, lon):
+        """Forecast for the grid cell containing (lat, lon), fetching it on a miss."""
+        return self.get_cell(self.cell_of(lat, lon))
+
+    def nearest_cached(self, lat, lon, max_ring=NEAREST_MAX_RING):
+        """Closest fresh cached cell within max_ring cells, as (cell, forecast, distance_km), or None."""
+        ci, cj = self.cell_of(lat, lon)
+        best = None
+        # At most (2r+1)^2 dict lookups; cheaper than keeping a KD-tree in sync with expiry.
+        for i in range(ci - max_ring, ci + max_ring + 1):
+            for j in range(cj - max_ring, cj + max_ring + 1):
+                forecast = self._fresh((i, j))
+                if forecast is None or isinstance(forecast, Exception):
+                    continue
+                dist = haversine_km(lat, lon, *self.cell_center((i, j)))
+                if best is None or dist < best[2]:
+                    best = ((i, j), forecast, dist)
+        return best
+
+    def _get_cell_or_error(self, cell):
+        try:
+            return self.get_cell(cell)
+        except Exception as e:
+            return e
+
+    def resolve_many(self, farms, max_workers=BATCH_WORKERS):
+        """Map {farm_id: (lat, lon)} to {farm_id: forecast} with one fetch per distinct cell.
+
+        Farms whose cell could not be fetched map to the exception instead, so one
+        unreachable cell doesn't fail the whole batch.
+        """
+        by_cell = {}
+        for farm_id, (lat, lon) in farms.items():
+            by_cell.setdefault(self.cell_of(lat, lon), []).append(farm_id)
+
+        cells = list(by_cell)
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            forecasts = pool.map(self._get_cell_or_error, cells)
+            results = {}
+            for cell, forecast in zip(cells, forecasts):
+                for farm_id in by_cell[cell]:
+                    results[farm_id] = forecast
+        return results
+
+    def stats(self):
+        return {"cells_cached": len(self._cells), "resolution_deg": self.resolution}
@@ -1,6 +1,7 @@
 # weather_service.py
-import requests
 from collections import defaultdict
+from weather_client import get_client, WeatherUnavailable
+from weather_grid import ForecastGrid
 
 # ---- CONFIG ----
 WIND_ALERT_THRESHOLD_MS = 15.0   # m/s (~54 km/h)
@@ -10,8 +11,6 @@ SUNLIGHT_HOURS_MIN = 4
 TEMP_TOO_HOT = 38.0
 TEMP_TOO_COLD = 10.0
 
-OPEN_METEO_ENDPOINT = "https://api.open-meteo.com/v1/forecast"
-
 JHARKHAND_LOCATIONS = {
     "Ranchi": (23.344315, 85.296013),
     "Jamshedpur": (22.805618, 86.203110),
@@ -34,9 +33,10 @@ def fetch_forecast(lat, lon, days=7):
         "timezone": "Asia/Kolkata",
         "forecast_days": days
     }
-    r = requests.get(OPEN_METEO_ENDPOINT, params=params, timeout=30)
-    r.raise_for_status()
-    return r.json()
+    return get_client().get_json(params)
+
+# Farms in the same grid cell share one 7-day forecast
+forecast_grid = ForecastGrid(lambda lat, lon: fetch_forecast(lat, lon, days=7))
 
 # -----------------------------
 # Aggregate daily weather and provide advice
@@ -143,6 +143,36 @@ def get_weather_for_district(district_name):
         return {"error": f"District '{district}' not found."}
 
     lat, lon = JHARKHAND_LOCATIONS[district]
-    forecast_json = fetch_forecast(lat, lon, days=7)
+    return {"district": district, **get_weather_for_location(lat, lon)}
+
+def get_weather_for_location(lat, lon):
+    try:
+        forecast_json = forecast_grid.get(lat, lon)
+    except WeatherUnavailable as e:
+        # Borrow a neighbouring cell's forecast rather than showing nothing
+        nearest = forecast_grid.nearest_cached(lat, lon)
+        if nearest is None:
+            return {"error": str(e)}
+        forecast_json = {**nearest[1], "stale": True}
+    return _summarize(forecast_json)
+
+def get_weather_for_farms(farms):
+    """farms: {farm_id: (lat, lon)}. Upstream calls scale with grid cells, not farms."""
+    # Summarise each distinct forecast once
+    summaries, results = {}, {}
+    for farm_id, forecast in forecast_grid.resolve_many(farms).items():
+        if isinstance(forecast, WeatherUnavailable):
+            # The failure is cached briefly, so this only tries a neighbouring cell
+            results[farm_id] = get_weather_for_location(*farms[farm_id])
+            continue
+        if isinstance(forecast, Exception):
+            raise forecast
+        if id(forecast) not in summaries:
+            summaries[id(forecast)] = _summarize(forecast)
+        results[farm_id] = summaries[id(forecast)]
+    return results
+
+def _summarize(forecast_json):
     daily_summary, alerts = aggregate_daily(forecast_json)
-    return {"district": district, "daily_summary": daily_summary, "alerts": alerts}
+    return {"daily_summary": daily_summary, "alerts": alerts,
+            "stale": forecast_json.get("stale", False)}
@@ -0,0 +1,94 @@
+# weather_stub.py
+# Local stand-in for the Open-Meteo forecast API so the app and tests can run offline.
+#   python weather_stub.py --port 8765
+#   OPEN_METEO_ENDPOINT=http://127.0.0.1:8765/v1/forecast python app.py
+import argparse, json, math, threading, time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+UTC_OFFSET_S = 19800   # Asia/Kolkata, the timezone the app requests
+
+
+def make_forecast(lat, lon, hourly_vars, days):
+    # Like Open-Meteo, hourly times are local to the requested timezone
+    local_now = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(seconds=UTC_OFFSET_S)
+    start = local_now.replace(hour=0, minute=0, second=0, microsecond=0)
+    times, values = [], {v: [] for v in hourly_vars}
+    for h in range(days * 24):
+        t = start + timedelta(hours=h)
+        times.append(t.strftime("%Y-%m-%dT%H:%M"))
+        day_curve = math.sin((t.hour - 6) / 24 * 2 * math.pi)  # peaks mid-afternoon
+        sample = {
+            "temperature_2m": round(27 + 6 * day_curve, 1),
+            "precipitation": 2.5 if t.hour in (15, 16) else 0.0,
+            "windspeed_10m": round(8 + 3 * day_curve, 1),
+            "shortwave_radiation": max(0.0, round(600 * day_curve, 1)),
+            "cloudcover": 40 + (t.day % 3) * 10,
+        }
+        for v in hourly_vars:
+            values[v].append(sample.get(v, 0.0))
+    return {"latitude": lat, "longitude": lon, "timezone": "Asia/Kolkata",
+            "utc_offset_seconds": UTC_OFFSET_S, "hourly": {"time": times, **values}}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # Behaviour knobs, set on the server: delay_s (stall before replying), fail_status (e.g. 503),
+    # fail_times (only fail the first N requests; None = every request)
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != "/v1/forecast":
+            self.send_error(404)
+            return
+        self.server.hits += 1
+        if self.server.delay_s:
+            time.sleep(self.server.delay_s)
+        failing = self.server.fail_times is None or self.server.hits <= self.server.fail_times
+        if self.server.fail_status and failing:
+            self.send_error(self.server.fail_status)
+            return
+
+        q = parse_qs(url.query)
+        body = json.dumps(make_forecast(
+            float(q.get("latitude", ["0"])[0]),
+            float(q.get("longitude", ["0"])[0]),
+            [v for v in q.get("hourly", [""])[0].split(",") if v],
+            int(q.get("forecast_days", ["1"])[0]),
+        )).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub(port=0, delay_s=0.0, fail_status=None, fail_times=None):
+    """Start the stub in a background thread; returns the server (see server.endpoint)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    server.daemon_threads = True
+    server.delay_s = delay_s
+    server.fail_status = fail_status
+    server.fail_times = fail_times
+    server.hits = 0
+    server.endpoint = f"http://127.0.0.1:{server.server_address[1]}/v1/forecast"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline Open-Meteo stub")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds to stall each response")
+    parser.add_argument("--fail", type=int, default=None, help="HTTP status to return instead of data")
+    args = parser.parse_args()
+    server = start_stub(args.port, args.delay, args.fail)
+    print("Weather stub serving on", server.endpoint)
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()